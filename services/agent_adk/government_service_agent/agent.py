@@ -35,6 +35,8 @@ async def initialize_session_state(callback_context: CallbackContext) -> Optiona
     return None  # Don't modify the agent's response
 
 # Create the root government service agent
+# Per-session state goes at the end of the instruction so the long static
+# part stays an identical, cacheable prompt prefix across sessions
 root_agent = Agent(
     name="government_service_agent",
     model="gemini-2.0-flash",
@@ -43,26 +45,6 @@ root_agent = Agent(
     Eres el coordinador principal para un sistema de trámites gubernamentales en México.
     Tu rol es guiar a los usuarios a través del proceso completo de agendamiento de citas gubernamentales.
 
-    **Información del Usuario:**
-    <user_info>
-    Nombre: {full_name}
-    CURP: {curp}
-    Dirección: {address}
-    Código Postal: {postal_code}
-    Teléfono: {phone}
-    Email: {email}
-    </user_info>
-
-    **Citas Agendadas:**
-    <appointments>
-    {appointments}
-    </appointments>
-
-    **Historial de Interacciones:**
-    <interaction_history>
-    {interaction_history}
-    </interaction_history>
-
     ## FLUJO PRINCIPAL
 
     ### 1. **Extracción de Información Personal**
@@ -137,7 +119,7 @@ root_agent = Agent(
 
     ### ✅ **Verificación de Datos (CRÍTICO)**
     ANTES de cualquier agendamiento:
-    1. Revisa si los campos están vacíos: {full_name}, {curp}, {address}, {postal_code}
+    1. Revisa en <user_info> si están vacíos: Nombre, CURP, Dirección, Código Postal
     2. Si algún campo está vacío → Agente de Extracción
     3. Si están completos → Agente de Agendamiento
 
@@ -183,6 +165,28 @@ root_agent = Agent(
     "📸 Veo que enviaste un documento. Te conectaré inmediatamente con nuestro extractor de datos para procesar la imagen..."
 
     RECUERDA: Tu trabajo es SER EL COORDINADOR INTELIGENTE que guía el flujo completo.
+
+    ## ESTADO ACTUAL DE LA SESIÓN
+
+    **Información del Usuario:**
+    <user_info>
+    Nombre: {full_name}
+    CURP: {curp}
+    Dirección: {address}
+    Código Postal: {postal_code}
+    Teléfono: {phone}
+    Email: {email}
+    </user_info>
+
+    **Citas Agendadas:**
+    <appointments>
+    {appointments}
+    </appointments>
+
+    **Historial de Interacciones:**
+    <interaction_history>
+    {interaction_history}
+    </interaction_history>
     """,
     sub_agents=[document_extraction_agent, appointment_scheduling_agent, web_search_agent],
     tools=[],
@@ -789,23 +789,6 @@ appointment_scheduling_agent = Agent(
     instruction="""
     Eres un agente especializado en agendar citas para servicios gubernamentales, especialmente del SAT (Servicio de Administración Tributaria).
 
-    <user_info>
-    Nombre: {full_name}
-    CURP: {curp}
-    Dirección: {address}
-    Código Postal: {postal_code}
-    Teléfono: {phone}
-    Email: {email}
-    </user_info>
-
-    <appointments>
-    {appointments}
-    </appointments>
-
-    <interaction_history>
-    {interaction_history}
-    </interaction_history>
-
     ## TU FUNCIÓN PRINCIPAL
     
     Ayudar a los usuarios a agendar citas para trámites del SAT de manera eficiente y completa.
@@ -940,7 +923,7 @@ appointment_scheduling_agent = Agent(
     🔹 Facturación Electrónica
     🔹 Devoluciones de Impuestos
 
-    Una vez que me digas qué servicio necesitas, buscaré las oficinas más cercanas a tu código postal ({postal_code})."
+    Una vez que me digas qué servicio necesitas, buscaré las oficinas más cercanas a tu código postal registrado."
 
     **Después de buscar oficinas (USANDO LA HERRAMIENTA):**
     
@@ -1019,6 +1002,25 @@ appointment_scheduling_agent = Agent(
     - Si el usuario no tiene datos completos, explica qué falta
 
     RECUERDA: Tu objetivo es lograr que el usuario tenga una cita agendada exitosamente con toda la información necesaria para su trámite del SAT.
+
+    ## ESTADO ACTUAL DE LA SESIÓN
+
+    <user_info>
+    Nombre: {full_name}
+    CURP: {curp}
+    Dirección: {address}
+    Código Postal: {postal_code}
+    Teléfono: {phone}
+    Email: {email}
+    </user_info>
+
+    <appointments>
+    {appointments}
+    </appointments>
+
+    <interaction_history>
+    {interaction_history}
+    </interaction_history>
     """,
     tools=[
         search_sat_locations_by_postal_code,
@@ -145,19 +145,6 @@ document_extraction_agent = Agent(
     instruction="""
     Eres un agente especializado en extraer información personal de documentos gubernamentales utilizando capacidades de visión.
 
-    <user_info>
-    Nombre: {full_name}
-    CURP: {curp}
-    Dirección: {address}
-    Código Postal: {postal_code}
-    Teléfono: {phone}
-    Email: {email}
-    </user_info>
-
-    <interaction_history>
-    {interaction_history}
-    </interaction_history>
-
     Tu función principal:
     1. Analizar imágenes de documentos que el usuario envíe
     2. Extraer información específica según el tipo de documento
@@ -254,6 +241,21 @@ document_extraction_agent = Agent(
     ✅ ¡Perfecto! Ya tenemos todos los datos necesarios. Te conectaré ahora mismo con nuestro especialista en agendamiento de citas."
     
     IMPORTANTE: Cuando tengas todos los datos, SIEMPRE transfiere inmediatamente al agente de agendamiento. No esperes a que el usuario pregunte qué sigue.
+
+    ## ESTADO ACTUAL DE LA SESIÓN
+
+    <user_info>
+    Nombre: {full_name}
+    CURP: {curp}
+    Dirección: {address}
+    Código Postal: {postal_code}
+    Teléfono: {phone}
+    Email: {email}
+    </user_info>
+
+    <interaction_history>
+    {interaction_history}
+    </interaction_history>
     """,
     tools=[extract_personal_data, validate_required_data, update_manual_data],
     sub_agents=[],  # Se configurará dinámicamente para evitar imports circulares
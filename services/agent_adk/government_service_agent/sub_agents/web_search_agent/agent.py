@@ -1,5 +1,6 @@
 import os
 from datetime import datetime
+from functools import lru_cache
 from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
 from dotenv import load_dotenv
@@ -8,6 +9,14 @@ from typing import List, Dict, Optional
 # Cargar variables de entorno
 load_dotenv()
 
+
+@lru_cache(maxsize=4)
+def _get_tavily_client(api_key: Optional[str]):
+    """Reutiliza un cliente de Tavily por API key en lugar de crearlo en cada búsqueda."""
+    from tavily import TavilyClient
+    return TavilyClient(api_key=api_key)
+
+
 def search_web_with_tavily(
     tool_context: ToolContext, 
     query: str, 
@@ -19,17 +28,12 @@ def search_web_with_tavily(
     """
     Realiza una búsqueda directa en internet utilizando la API de Tavily.
     """
-    try:
-        from tavily import TavilyClient
-    except ImportError:
-        return {"status": "error", "message": "Falta librería tavily-python."}
-
     api_key = os.getenv("TAVILY_API_KEY")
     if not api_key:
         return {"status": "error", "message": "Falta TAVILY_API_KEY"}
 
     try:
-        tavily = TavilyClient(api_key=api_key)
+        tavily = _get_tavily_client(api_key)
         
         # --- BÚSQUEDA DIRECTA (SIN MAGIA EXTRA) ---
         response = tavily.search(
@@ -62,15 +66,15 @@ def search_web_with_tavily(
             "results": results
         }
 
+    except ImportError:
+        return {"status": "error", "message": "Falta librería tavily-python."}
     except Exception as e:
         return {"status": "error", "message": f"Error en Tavily: {str(e)}"}
 
 def get_page_content(tool_context: ToolContext, url: str) -> dict:
     """Extrae el contenido de una URL específica."""
     try:
-        from tavily import TavilyClient
-        api_key = os.getenv("TAVILY_API_KEY")
-        tavily = TavilyClient(api_key=api_key)
+        tavily = _get_tavily_client(os.getenv("TAVILY_API_KEY"))
         
         response = tavily.search(url=url, search_depth="advanced", max_results=1)
         content = ""
@@ -15,6 +15,10 @@ from ..config import (
 
 logger = logging.getLogger(__name__)
 
+# Corpus name patterns, compiled once at import time
+_CORPUS_RESOURCE_NAME_RE = re.compile(r"^projects/[^/]+/locations/[^/]+/ragCorpora/[^/]+$")
+_CORPUS_ID_UNSAFE_CHARS_RE = re.compile(r"[^a-zA-Z0-9_-]")
+
 
 def get_corpus_resource_name(corpus_name: str, tool_context: ToolContext = None) -> str:
     """
@@ -28,17 +32,17 @@ def get_corpus_resource_name(corpus_name: str, tool_context: ToolContext = None)
     Returns:
         str: The full resource name of the corpus
     """
-    logger.info(f"Getting resource name for corpus: {corpus_name}")
+    logger.info("Getting resource name for corpus: %s", corpus_name)
 
     # First, check if we have the resource name saved in the tool context
     if tool_context and tool_context.state:
         saved_resource_name = tool_context.state.get(f"corpus_resource_name_{corpus_name}")
         if saved_resource_name:
-            logger.info(f"Found saved resource name: {saved_resource_name}")
+            logger.info("Found saved resource name: %s", saved_resource_name)
             return saved_resource_name
 
     # If it's already a full resource name with the projects/locations/ragCorpora format
-    if re.match(r"^projects/[^/]+/locations/[^/]+/ragCorpora/[^/]+$", corpus_name):
+    if _CORPUS_RESOURCE_NAME_RE.match(corpus_name):
         return corpus_name
 
     # Check if this is a display name of an existing corpus
@@ -52,10 +56,19 @@ def get_corpus_resource_name(corpus_name: str, tool_context: ToolContext = None)
                     tool_context.state[f"corpus_resource_name_{corpus_name}"] = corpus.name
                 return corpus.name
     except Exception as e:
-        logger.warning(f"Error when checking for corpus display name: {str(e)}")
+        logger.warning("Error when checking for corpus display name: %s", e)
         # If we can't check, continue with the default behavior
         pass
 
+    return _build_corpus_resource_name(corpus_name)
+
+
+def _build_corpus_resource_name(corpus_name: str) -> str:
+    """Build the standardized resource name for a corpus without any API calls."""
+    # If it's already a full resource name with the projects/locations/ragCorpora format
+    if _CORPUS_RESOURCE_NAME_RE.match(corpus_name):
+        return corpus_name
+
     # If it contains partial path elements, extract just the corpus ID
     if "/" in corpus_name:
         # Extract the last part of the path as the corpus ID
@@ -64,7 +77,7 @@ def get_corpus_resource_name(corpus_name: str, tool_context: ToolContext = None)
         corpus_id = corpus_name
 
     # Remove any special characters that might cause issues
-    corpus_id = re.sub(r"[^a-zA-Z0-9_-]", "_", corpus_id)
+    corpus_id = _CORPUS_ID_UNSAFE_CHARS_RE.sub("_", corpus_id)
 
     # Construct the standardized resource name
     return f"projects/{PROJECT_ID}/locations/{LOCATION}/ragCorpora/{corpus_id}"
@@ -86,8 +99,12 @@ def check_corpus_exists(corpus_name: str, tool_context: ToolContext) -> bool:
         return True
 
     try:
-        # Get full resource name
-        corpus_resource_name = get_corpus_resource_name(corpus_name, tool_context)
+        # Get full resource name; display names are matched in the listing
+        # below, so this avoids a second list_corpora call
+        corpus_resource_name = (
+            tool_context.state.get(f"corpus_resource_name_{corpus_name}")
+            or _build_corpus_resource_name(corpus_name)
+        )
 
         # List all corpora and check if this one exists
         corpora = rag.list_corpora()
@@ -107,7 +124,7 @@ def check_corpus_exists(corpus_name: str, tool_context: ToolContext) -> bool:
 
         return False
     except Exception as e:
-        logger.error(f"Error checking if corpus exists: {str(e)}")
+        logger.error("Error checking if corpus exists: %s", e)
         # If we can't check, assume it doesn't exist
         return False
 
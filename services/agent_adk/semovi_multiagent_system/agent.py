@@ -52,20 +52,24 @@ from .sub_agents.appointment_booking_agent.agent import appointment_booking_agen
 from .sub_agents.semovi_information_agent.agent import semovi_information_agent
 
 
+# Ordered list of process stages, plus a set for constant-time validation
+VALID_PROCESS_STAGES = (
+    "welcome", "authentication_required", "authenticated",
+    "ine_extraction", "ine_extracted", 
+    "service_consultation", "service_determined",
+    "office_search", "offices_found", "office_selected",
+    "appointment_booking", "appointment_confirmed"
+)
+_VALID_PROCESS_STAGE_SET = frozenset(VALID_PROCESS_STAGES)
+_INVALID_STAGE_HINT = ", ".join(VALID_PROCESS_STAGES)
+
+
 def validate_process_stage(stage: str, tool_context: ToolContext) -> dict:
     """Validate and update the current process stage."""
-    valid_stages = [
-        "welcome", "authentication_required", "authenticated",
-        "ine_extraction", "ine_extracted", 
-        "service_consultation", "service_determined",
-        "office_search", "offices_found", "office_selected",
-        "appointment_booking", "appointment_confirmed"
-    ]
-    
-    if stage not in valid_stages:
+    if stage not in _VALID_PROCESS_STAGE_SET:
         return {
             "status": "error",
-            "message": f"Invalid stage: {stage}. Valid stages: {', '.join(valid_stages)}"
+            "message": f"Invalid stage: {stage}. Valid stages: {_INVALID_STAGE_HINT}"
         }
     
     tool_context.state["process_stage"] = stage
@@ -2,138 +2,150 @@
 
 """System callbacks for initialization and state management."""
 
-from datetime import datetime
+import copy
+import logging
+from datetime import datetime, timedelta
 from typing import Optional
 import uuid
 
 from google.adk.agents.callback_context import CallbackContext
 from google.genai import types
 
+logger = logging.getLogger(__name__)
 
-async def initialize_semovi_session(callback_context: CallbackContext) -> Optional[types.Content]:
-    """
-    Initialize SEMOVI session state with required fields.
-    
-    This callback ensures all required state fields are properly initialized
-    before any agent processing begins.
-    """
-    # Define required session fields for SEMOVI system
-    required_fields = {
-        "user_data": {
-            "full_name": "",
-            "curp": "",
-            "address": "",
-            "postal_code": "",
-            "birth_date": "",
-            "phone": "",
-            "email": "",
-            "extraction_timestamp": "",
-            "extraction_method": ""
-        },
-        "service_determination": {
-            "status": "",
-            "license_type": "",  # LIC_A | LIC_A1 | LIC_A2
-            "procedure_type": "",  # EXPEDITION | RENEWAL | REPLACEMENT
-            "vehicle_info": {
-                "type": "",  # auto | motorcycle
-                "cylinder_capacity": None
-            },
-            "costs": {
-                "base_cost": 0.0,
-                "additional_cost": 0.0, 
-                "total_cost": 0.0,
-                "currency": "MXN"
-            },
-            "requirements": {
-                "total_requirements": 0,
-                "required_documents": [],
-                "base_requirements": [],
-                "license_specific": [],
-                "procedure_specific": []
-            },
-            "age_validation": {},
-            "processing_time_days": 1,
-            "validity_years": 3
-        },
-        "office_search": {
-            "search_postal_code": "",
-            "found_offices": [],
-            "total_found": 0,
-            "search_timestamp": ""
+
+# Default values for required SEMOVI session fields. session_metadata is
+# built per session in initialize_semovi_session since it holds a fresh ID and
+# timestamps. Defaults are deep-copied into state so sessions never share them.
+_SESSION_STATE_DEFAULTS = {
+    "user_data": {
+        "full_name": "",
+        "curp": "",
+        "address": "",
+        "postal_code": "",
+        "birth_date": "",
+        "phone": "",
+        "email": "",
+        "extraction_timestamp": "",
+        "extraction_method": ""
+    },
+    "service_determination": {
+        "status": "",
+        "license_type": "",  # LIC_A | LIC_A1 | LIC_A2
+        "procedure_type": "",  # EXPEDITION | RENEWAL | REPLACEMENT
+        "vehicle_info": {
+            "type": "",  # auto | motorcycle
+            "cylinder_capacity": None
         },
-        "appointment": {
-            "office_id": None,
-            "office_name": "",
-            "available_slots": [],
-            "slots_by_date": {},
-            "search_range_days": 14,
-            "last_availability_check": "",
-            "selected_slot": {
-                "slot_id": None,
-                "date": "",
-                "time": ""
-            },
-            "confirmation": {
-                "appointment_id": None,
-                "confirmation_code": "",
-                "status": "",
-                "office": {},
-                "date": "",
-                "time": "",
-                "license_type": "",
-                "procedure_type": "",
-                "total_cost": 0.0,
-                "created_at": ""
-            }
+        "costs": {
+            "base_cost": 0.0,
+            "additional_cost": 0.0, 
+            "total_cost": 0.0,
+            "currency": "MXN"
         },
-        "process_stage": "welcome",  # welcome -> authentication_required -> authenticated -> ine_extraction -> service_consultation -> office_search -> appointment_booking -> confirmed
-        "session_metadata": {
-            "session_id": str(uuid.uuid4()),
-            "created_at": datetime.now().isoformat(),
-            "last_activity": datetime.now().isoformat(),
-            "interaction_count": 0,
-            "agent_transitions": []
+        "requirements": {
+            "total_requirements": 0,
+            "required_documents": [],
+            "base_requirements": [],
+            "license_specific": [],
+            "procedure_specific": []
         },
-        "information_queries": {
-            "queries_made": [],
-            "corpus_status": "ready",
-            "last_corpus_update": "2024-12-01T00:00:00Z"
-        },
-        "validation_results": {},
-        "missing_info_request": {},
-        "cost_calculation": {},
         "age_validation": {},
-        "email_confirmation": {},
-        "pdf_confirmation": {},
-        "last_generated_code": {},
-        "last_error": {},
-        "last_auth_error": {},
-        "last_logout": {},
-        "authentication_status": {
-            "is_authenticated": False,
-            "jwt_token": None,
-            "auth_user_id": None,
-            "authenticated_at": None,
-            "user_profile": {}
+        "processing_time_days": 1,
+        "validity_years": 3
+    },
+    "office_search": {
+        "search_postal_code": "",
+        "found_offices": [],
+        "total_found": 0,
+        "search_timestamp": ""
+    },
+    "appointment": {
+        "office_id": None,
+        "office_name": "",
+        "available_slots": [],
+        "slots_by_date": {},
+        "search_range_days": 14,
+        "last_availability_check": "",
+        "selected_slot": {
+            "slot_id": None,
+            "date": "",
+            "time": ""
         },
-        # Additional state variables used by tools
+        "confirmation": {
+            "appointment_id": None,
+            "confirmation_code": "",
+            "status": "",
+            "office": {},
+            "date": "",
+            "time": "",
+            "license_type": "",
+            "procedure_type": "",
+            "total_cost": 0.0,
+            "created_at": ""
+        }
+    },
+    "process_stage": "welcome",  # welcome -> authentication_required -> authenticated -> ine_extraction -> service_consultation -> office_search -> appointment_booking -> confirmed
+    "information_queries": {
+        "queries_made": [],
+        "corpus_status": "ready",
+        "last_corpus_update": "2024-12-01T00:00:00Z"
+    },
+    "validation_results": {},
+    "missing_info_request": {},
+    "cost_calculation": {},
+    "age_validation": {},
+    "email_confirmation": {},
+    "pdf_confirmation": {},
+    "last_generated_code": {},
+    "last_error": {},
+    "last_auth_error": {},
+    "last_logout": {},
+    "authentication_status": {
+        "is_authenticated": False,
         "jwt_token": None,
-        "auth_user_id": None, 
+        "auth_user_id": None,
         "authenticated_at": None,
-        "user_profile": {},
-        # Flatten key variables for template access
-        "license_type": "",
-        "procedure_type": "",
-        "appointment_date": "",
-        "appointment_time": "",
-        "office_name": "",
-        "total_cost": ""
-    }
+        "user_profile": {}
+    },
+    # Additional state variables used by tools
+    "jwt_token": None,
+    "auth_user_id": None, 
+    "authenticated_at": None,
+    "user_profile": {},
+    # Flatten key variables for template access
+    "license_type": "",
+    "procedure_type": "",
+    "appointment_date": "",
+    "appointment_time": "",
+    "office_name": "",
+    "total_cost": ""
+}
+
+
+async def initialize_semovi_session(callback_context: CallbackContext) -> Optional[types.Content]:
+    """
+    Initialize SEMOVI session state with required fields.
+    
+    This callback ensures all required state fields are properly initialized
+    before any agent processing begins.
+    """
+    # Single timestamp for everything stamped during this invocation
+    now = datetime.now().isoformat()
     
     # Initialize missing fields
-    for field, default_value in required_fields.items():
+    for field, default_value in _SESSION_STATE_DEFAULTS.items():
         if field not in callback_context.state:
-            callback_context.state[field] = default_value
+            callback_context.state[field] = copy.deepcopy(default_value)
+    
+    if "session_metadata" not in callback_context.state:
+        callback_context.state["session_metadata"] = {
+            "session_id": str(uuid.uuid4()),
+            "created_at": now,
+            "last_activity": now,
+            "interaction_count": 0,
+            "agent_transitions": []
+        }
     
     # 🔥 AUTO-AUTHENTICATE WITH JWT TOKEN FROM FRONTEND
     # Check if JWT token was sent from frontend in state_delta
@@ -169,7 +181,7 @@ async def initialize_semovi_session(callback_context: CallbackContext) -> Option
                 del callback_context.state["jwt_token"]
     
     # Update session metadata
-    callback_context.state["session_metadata"]["last_activity"] = datetime.now().isoformat()
+    callback_context.state["session_metadata"]["last_activity"] = now
     interactions = callback_context.state["session_metadata"].get("interaction_count", 0)
     callback_context.state["session_metadata"]["interaction_count"] = interactions + 1
     
@@ -181,12 +193,16 @@ async def initialize_semovi_session(callback_context: CallbackContext) -> Option
 
 def _log_session_activity(state: dict) -> None:
     """Log session activity for monitoring and debugging."""
+    # Runs on every invocation; skip the state lookups unless debug logging is on
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    
     session_id = state.get("session_metadata", {}).get("session_id", "unknown")
     interaction_count = state.get("session_metadata", {}).get("interaction_count", 0)
     process_stage = state.get("process_stage", "unknown")
     
-    print(f"[SEMOVI_SYSTEM] Session: {session_id[:8]}... | "
-          f"Interaction: #{interaction_count} | Stage: {process_stage}")
+    logger.debug("[SEMOVI_SYSTEM] Session: %s... | Interaction: #%s | Stage: %s",
+                 session_id[:8], interaction_count, process_stage)
 
 
 async def cleanup_session_callback(callback_context: CallbackContext) -> Optional[types.Content]:
@@ -195,21 +211,25 @@ async def cleanup_session_callback(callback_context: CallbackContext) -> Optiona
     
     Handles temporary data cleanup and optional persistence of critical data.
     """
+    current_time = datetime.now()
+    
     # Clean up temporary data if it exists
     if "temporary_data" in callback_context.state:
-        current_time = datetime.now()
         temp_data = callback_context.state["temporary_data"]
         
         # Remove temporary data older than 1 hour
-        for key, data in list(temp_data.items()):
-            if isinstance(data, dict) and "created_at" in data:
-                created_time = datetime.fromisoformat(data["created_at"])
-                if (current_time - created_time).total_seconds() > 3600:  # 1 hour
-                    del temp_data[key]
+        cutoff = current_time - timedelta(hours=1)
+        expired_keys = [
+            key for key, data in temp_data.items()
+            if isinstance(data, dict) and "created_at" in data
+            and datetime.fromisoformat(data["created_at"]) < cutoff
+        ]
+        for key in expired_keys:
+            del temp_data[key]
     
     # Update last activity timestamp
     if "session_metadata" in callback_context.state:
-        callback_context.state["session_metadata"]["last_activity"] = datetime.now().isoformat()
+        callback_context.state["session_metadata"]["last_activity"] = current_time.isoformat()
     
     return None
 
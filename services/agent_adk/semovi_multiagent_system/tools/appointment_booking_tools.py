@@ -4,25 +4,126 @@
 
 import uuid
 import os
+import re
 import base64
 from datetime import datetime, date, timedelta
 from io import BytesIO
 
 from google.adk.tools.tool_context import ToolContext
 from .supabase_connection import execute_supabase_query, get_user_id_from_jwt, ensure_user_profile_exists
+from .office_location_tools import find_office_in_search_results
 
-# Imports for email and PDF
+# resend and reportlab are imported lazily inside the email/PDF tools so that
+# loading the agent does not pay for them until a confirmation is requested
 try:
-    import resend
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib.colors import black, darkblue, darkgreen
     from dotenv import load_dotenv
     load_dotenv()
 except ImportError:
     pass
 
 
+# Anything outside this set is replaced when a confirmation code becomes a
+# filename, since appointment_details comes from the model and may contain
+# path separators
+_UNSAFE_FILENAME_CHARS_RE = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def _confirmation_pdf_filename(confirmation_code: str) -> str:
+    """Build a safe PDF filename for a confirmation code."""
+    return f"SEMOVI_Cita_{_UNSAFE_FILENAME_CHARS_RE.sub('_', confirmation_code)}.pdf"
+
+
+# Static HTML layout for the confirmation email, formatted per appointment
+_CONFIRMATION_EMAIL_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <style>
+        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+        .header {{ background: linear-gradient(135deg, #dc2626 0%, #ef4444 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
+        .content {{ background: #fef2f2; padding: 30px; border-radius: 0 0 10px 10px; }}
+        .appointment-card {{ background: white; padding: 25px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); margin: 20px 0; border-left: 4px solid #dc2626; }}
+        .detail-row {{ display: flex; justify-content: space-between; margin: 12px 0; padding: 8px 0; border-bottom: 1px solid #f3f4f6; }}
+        .label {{ font-weight: bold; color: #7f1d1d; }}
+        .value {{ color: #1f2937; }}
+        .confirmation-box {{ background: #16a34a; color: white; padding: 15px; border-radius: 6px; text-align: center; margin: 20px 0; }}
+        .cost-box {{ background: #fbbf24; color: #1f2937; padding: 15px; border-radius: 6px; text-align: center; margin: 20px 0; }}
+        .footer {{ text-align: center; color: #6b7280; margin-top: 30px; }}
+        .logo {{ font-size: 24px; font-weight: bold; margin-bottom: 10px; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <div class="logo">🚗 SEMOVI</div>
+            <h1>Confirmación de Cita</h1>
+            <p>Secretaría de Movilidad - Ciudad de México</p>
+        </div>
+        
+        <div class="content">
+            <p><strong>{user_name},</strong></p>
+            <p>Su cita para trámite de licencia de conducir ha sido <strong>confirmada exitosamente</strong>.</p>
+            
+            <div class="confirmation-box">
+                <h3>📋 Número de Confirmación: {confirmation_code}</h3>
+            </div>
+            
+            <div class="appointment-card">
+                <h3>🎫 Detalles de su Cita</h3>
+                <div class="detail-row">
+                    <span class="label">👤 Solicitante:</span>
+                    <span class="value">{user_name}</span>
+                </div>
+                <div class="detail-row">
+                    <span class="label">📅 Fecha:</span>
+                    <span class="value">{appointment_date}</span>
+                </div>
+                <div class="detail-row">
+                    <span class="label">⏰ Hora:</span>
+                    <span class="value">{appointment_time}</span>
+                </div>
+                <div class="detail-row">
+                    <span class="label">📍 Oficina SEMOVI:</span>
+                    <span class="value">{office_name}</span>
+                </div>
+                <div class="detail-row">
+                    <span class="label">📋 Tipo de Licencia:</span>
+                    <span class="value">{license_type}</span>
+                </div>
+                <div class="detail-row">
+                    <span class="label">🔄 Procedimiento:</span>
+                    <span class="value">{procedure_type}</span>
+                </div>
+            </div>
+            
+            <div class="cost-box">
+                <h4>💰 Costo Total: ${total_cost:.2f} MXN</h4>
+            </div>
+            
+            <div style="background: #fef3c7; padding: 20px; border-radius: 6px; margin: 20px 0; border-left: 4px solid #f59e0b;">
+                <h4>⚠️ Recordatorios Importantes:</h4>
+                <ul>
+                    <li>🕘 Presente se <strong>10 minutos antes</strong> de su cita</li>
+                    <li>🆔 Traiga su <strong>identificación oficial vigente</strong></li>
+                    <li>📄 Adjunto encontrará su <strong>comprobante en PDF</strong></li>
+                    <li>💳 Lleve el <strong>pago exacto</strong> en efectivo o tarjeta</li>
+                    <li>📞 Para reagendar, contacte la oficina con 24 horas de anticipación</li>
+                </ul>
+            </div>
+        </div>
+        
+        <div class="footer">
+            <p>Este correo fue generado automáticamente por el Sistema de Citas SEMOVI</p>
+            <p><small>© 2024 Secretaría de Movilidad - Ciudad de México</small></p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+
 def get_available_slots(
     tool_context, 
     office_id: int, 
@@ -41,14 +142,7 @@ def get_available_slots(
     """
     try:
         # Validate office_id
-        office_search = tool_context.state.get("office_search", {})
-        found_offices = office_search.get("found_offices", [])
-        
-        target_office = None
-        for office in found_offices:
-            if office["id"] == office_id:
-                target_office = office
-                break
+        target_office = find_office_in_search_results(tool_context, office_id)
         
         if not target_office:
             return {
@@ -57,8 +151,9 @@ def get_available_slots(
             }
         
         # Calculate date range
-        start_date = (date.today() + timedelta(days=1)).isoformat()
-        end_date = (date.today() + timedelta(days=target_date_range)).isoformat()
+        today = date.today()
+        start_date = (today + timedelta(days=1)).isoformat()
+        end_date = (today + timedelta(days=target_date_range)).isoformat()
         
         # Query available slots from Supabase
         query_result = execute_supabase_query(
@@ -120,15 +215,17 @@ def get_available_slots(
 
 
 def _group_slots_by_date(slots: list):
-    """Group appointment slots by date for better presentation."""
+    """
+    Group appointment slots by date for better presentation.
+    
+    Slots must already be ordered by date and start time (the slots query
+    asks Supabase for order=slot_date,start_time), so grouping in a single
+    pass keeps both dates and times sorted.
+    """
     slots_by_date = {}
     
     for slot in slots:
-        slot_date = slot["slot_date"]
-        if slot_date not in slots_by_date:
-            slots_by_date[slot_date] = []
-        
-        slots_by_date[slot_date].append({
+        slots_by_date.setdefault(slot["slot_date"], []).append({
             "id": slot["id"],
             "start_time": slot["start_time"],
             "end_time": slot["end_time"],
@@ -136,11 +233,7 @@ def _group_slots_by_date(slots: list):
             "max_capacity": slot["max_capacity"]
         })
     
-    # Sort dates and times
-    for date_key in slots_by_date:
-        slots_by_date[date_key].sort(key=lambda x: x["start_time"])
-    
-    return dict(sorted(slots_by_date.items()))
+    return slots_by_date
 
 
 def create_appointment(
@@ -215,7 +308,7 @@ def create_appointment(
         service_type_id = service_type_result["data"][0]["id"]
         
         # Generate confirmation code
-        confirmation_code = f"SEMOVI-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:4].upper()}"
+        confirmation_code = _new_confirmation_code(datetime.now())
         
         # Prepare user information for appointment
         user_info = {
@@ -280,14 +373,7 @@ def create_appointment(
             print(f"Warning: Failed to update slot capacity for slot {slot_id}")
         
         # Get office information
-        office_search = tool_context.state.get("office_search", {})
-        found_offices = office_search.get("found_offices", [])
-        selected_office = None
-        
-        for office in found_offices:
-            if office["id"] == office_id:
-                selected_office = office
-                break
+        selected_office = find_office_in_search_results(tool_context, office_id)
         
         # Store appointment confirmation in state
         confirmation_details = {
@@ -336,6 +422,11 @@ def create_appointment(
         }
 
 
+def _new_confirmation_code(now: datetime) -> str:
+    """Build a SEMOVI-YYYYMMDD-XXXX confirmation code for the given time."""
+    return f"SEMOVI-{now:%Y%m%d}-{uuid.uuid4().hex[:4].upper()}"
+
+
 def generate_confirmation_code(tool_context):
     """
     Generate a unique confirmation code for appointments.
@@ -346,14 +437,13 @@ def generate_confirmation_code(tool_context):
     Returns:
         Unique confirmation code
     """
-    timestamp = datetime.now().strftime("%Y%m%d")
-    unique_id = str(uuid.uuid4())[:4].upper()
-    confirmation_code = f"SEMOVI-{timestamp}-{unique_id}"
+    now = datetime.now()
+    confirmation_code = _new_confirmation_code(now)
     
     # Store in state for reference
     tool_context.state["last_generated_code"] = {
         "code": confirmation_code,
-        "generated_at": datetime.now().isoformat()
+        "generated_at": now.isoformat()
     }
     
     return confirmation_code
@@ -468,6 +558,8 @@ def send_email_confirmation(
             }
         
         # 2. CONFIGURAR RESEND
+        import resend
+
         resend_api_key = os.getenv("RESEND_API_KEY")
         from_email = os.getenv("RESEND_FROM_EMAIL", "Trámites Gubernamentales <notifications@diperion.com>")
         
@@ -477,94 +569,16 @@ def send_email_confirmation(
         resend.api_key = resend_api_key
 
         # 3. CREAR CONTENIDO HTML PROFESIONAL PARA SEMOVI
-        html_body = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background: linear-gradient(135deg, #dc2626 0%, #ef4444 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
-                .content {{ background: #fef2f2; padding: 30px; border-radius: 0 0 10px 10px; }}
-                .appointment-card {{ background: white; padding: 25px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); margin: 20px 0; border-left: 4px solid #dc2626; }}
-                .detail-row {{ display: flex; justify-content: space-between; margin: 12px 0; padding: 8px 0; border-bottom: 1px solid #f3f4f6; }}
-                .label {{ font-weight: bold; color: #7f1d1d; }}
-                .value {{ color: #1f2937; }}
-                .confirmation-box {{ background: #16a34a; color: white; padding: 15px; border-radius: 6px; text-align: center; margin: 20px 0; }}
-                .cost-box {{ background: #fbbf24; color: #1f2937; padding: 15px; border-radius: 6px; text-align: center; margin: 20px 0; }}
-                .footer {{ text-align: center; color: #6b7280; margin-top: 30px; }}
-                .logo {{ font-size: 24px; font-weight: bold; margin-bottom: 10px; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <div class="logo">🚗 SEMOVI</div>
-                    <h1>Confirmación de Cita</h1>
-                    <p>Secretaría de Movilidad - Ciudad de México</p>
-                </div>
-                
-                <div class="content">
-                    <p><strong>{user_name},</strong></p>
-                    <p>Su cita para trámite de licencia de conducir ha sido <strong>confirmada exitosamente</strong>.</p>
-                    
-                    <div class="confirmation-box">
-                        <h3>📋 Número de Confirmación: {confirmation_code}</h3>
-                    </div>
-                    
-                    <div class="appointment-card">
-                        <h3>🎫 Detalles de su Cita</h3>
-                        <div class="detail-row">
-                            <span class="label">👤 Solicitante:</span>
-                            <span class="value">{user_name}</span>
-                        </div>
-                        <div class="detail-row">
-                            <span class="label">📅 Fecha:</span>
-                            <span class="value">{appointment_date}</span>
-                        </div>
-                        <div class="detail-row">
-                            <span class="label">⏰ Hora:</span>
-                            <span class="value">{appointment_time}</span>
-                        </div>
-                        <div class="detail-row">
-                            <span class="label">📍 Oficina SEMOVI:</span>
-                            <span class="value">{office_name}</span>
-                        </div>
-                        <div class="detail-row">
-                            <span class="label">📋 Tipo de Licencia:</span>
-                            <span class="value">{license_type}</span>
-                        </div>
-                        <div class="detail-row">
-                            <span class="label">🔄 Procedimiento:</span>
-                            <span class="value">{procedure_type}</span>
-                        </div>
-                    </div>
-                    
-                    <div class="cost-box">
-                        <h4>💰 Costo Total: ${total_cost:.2f} MXN</h4>
-                    </div>
-                    
-                    <div style="background: #fef3c7; padding: 20px; border-radius: 6px; margin: 20px 0; border-left: 4px solid #f59e0b;">
-                        <h4>⚠️ Recordatorios Importantes:</h4>
-                        <ul>
-                            <li>🕘 Presente se <strong>10 minutos antes</strong> de su cita</li>
-                            <li>🆔 Traiga su <strong>identificación oficial vigente</strong></li>
-                            <li>📄 Adjunto encontrará su <strong>comprobante en PDF</strong></li>
-                            <li>💳 Lleve el <strong>pago exacto</strong> en efectivo o tarjeta</li>
-                            <li>📞 Para reagendar, contacte la oficina con 24 horas de anticipación</li>
-                        </ul>
-                    </div>
-                </div>
-                
-                <div class="footer">
-                    <p>Este correo fue generado automáticamente por el Sistema de Citas SEMOVI</p>
-                    <p><small>© 2024 Secretaría de Movilidad - Ciudad de México</small></p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+        html_body = _CONFIRMATION_EMAIL_TEMPLATE.format(
+            user_name=user_name,
+            confirmation_code=confirmation_code,
+            appointment_date=appointment_date,
+            appointment_time=appointment_time,
+            office_name=office_name,
+            license_type=license_type,
+            procedure_type=procedure_type,
+            total_cost=total_cost,
+        )
 
         # 4. ENVIAR EMAIL CON RESEND (SINTAXIS OFICIAL)
         params = {
@@ -575,7 +589,7 @@ def send_email_confirmation(
             "attachments": [
                 {
                     "content": pdf_result["pdf_base64"],
-                    "filename": f"SEMOVI_Cita_{confirmation_code}.pdf"
+                    "filename": _confirmation_pdf_filename(confirmation_code)
                 }
             ]
         }
@@ -813,6 +827,7 @@ def _generate_semovi_pdf_bytes(tool_context, appointment_details: dict) -> dict:
             "status": "success",
             "message": "PDF SEMOVI generado en memoria",
             "pdf_base64": pdf_base64,
+            "pdf_bytes": pdf_bytes,
             "pdf_size": len(pdf_bytes)
         }
         
@@ -836,33 +851,19 @@ def generate_pdf_confirmation(
     Returns:
         Dict with PDF generation results
     """
-    try:
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.colors import black, red, darkgreen
-    except ImportError:
-        return {"status": "error", "message": "reportlab no está instalado"}
-    
-    # Validar que appointment_details sea un diccionario
-    if not isinstance(appointment_details, dict):
-        return {
-            "status": "error", 
-            "message": f"appointment_details debe ser un diccionario, recibido: {type(appointment_details)}"
-        }
-    
-    confirmation_code = appointment_details.get("confirmation_code", "")
-    user_data = tool_context.state.get("user_data", {})
-    
-    # Use the same PDF generation logic but save to file
+    # Use the same PDF generation logic but save to file; it also checks
+    # that reportlab is installed and that appointment_details is a dict
     pdf_result = _generate_semovi_pdf_bytes(tool_context, appointment_details)
     if pdf_result["status"] != "success":
         return pdf_result
     
+    confirmation_code = appointment_details.get("confirmation_code", "")
+    
     # Save to file
-    filename = f"SEMOVI_Cita_{confirmation_code}.pdf"
+    filename = _confirmation_pdf_filename(confirmation_code)
     try:
         with open(filename, "wb") as f:
-            f.write(base64.b64decode(pdf_result["pdf_base64"]))
+            f.write(pdf_result["pdf_bytes"])
         
         abs_path = os.path.abspath(filename)
         
@@ -9,6 +9,7 @@ import json
 from datetime import datetime
 
 from google.adk.tools.tool_context import ToolContext
+from .supabase_connection import http_session
 
 
 def authenticate_user(user_email: str, user_password: str, tool_context: ToolContext):
@@ -59,7 +60,7 @@ def authenticate_user(user_email: str, user_password: str, tool_context: ToolCon
         }
         
         # Authenticate with Supabase Auth
-        auth_response = requests.post(
+        auth_response = http_session.post(
             f"{supabase_url}/auth/v1/token?grant_type=password",
             headers=headers,
             json=auth_data,
@@ -177,7 +178,7 @@ def _get_user_profile_by_token(tool_context: ToolContext, auth_token: str):
         }
         
         # Get user profile from profiles table (RLS will ensure only user's own profile)
-        response = requests.get(
+        response = http_session.get(
             f"{supabase_url}/rest/v1/profiles?select=*",
             headers=headers,
             timeout=10
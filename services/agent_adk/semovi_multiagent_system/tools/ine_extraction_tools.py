@@ -10,6 +10,24 @@ from datetime import datetime
 from google.adk.tools.tool_context import ToolContext
 
 
+# Patterns for text-based INE field extraction, compiled once at import time
+_CURP_SEARCH_RE = re.compile(r'\b[A-Z]{4}\d{6}[HM][A-Z]{5}[A-Z0-9]{2}\b')
+_POSTAL_CODE_SEARCH_RE = re.compile(r'\b\d{5}\b')
+_NAME_PATTERNS = (
+    re.compile(r'NOMBRE[:\s]+([A-Z\s]+?)(?:DOMICILIO|DIRECCION|CURP|$)'),
+    re.compile(r'APELLIDOS[:\s]+([A-Z\s]+?)(?:NOMBRE|DOMICILIO|$)'),
+)
+_ADDRESS_PATTERNS = (
+    re.compile(r'DOMICILIO[:\s]+([A-Z0-9\s,\.]+?)(?:EDAD|CLAVE|CURP|ESTADO|$)'),
+    re.compile(r'DIRECCION[:\s]+([A-Z0-9\s,\.]+?)(?:EDAD|CLAVE|CURP|ESTADO|$)'),
+)
+
+# Full-value format checks used by _validate_extracted_data
+_CURP_FORMAT_RE = re.compile(r'^[A-Z]{4}\d{6}[HM][A-Z]{5}[A-Z0-9]{2}$')
+_POSTAL_CODE_FORMAT_RE = re.compile(r'^\d{5}$')
+_NAME_FORMAT_RE = re.compile(r'^[A-Z\s]+$')
+
+
 def extract_ine_data_with_vision(tool_context: ToolContext, extracted_data: dict):
     """
     Process and store INE data extracted by the agent's vision capabilities.
@@ -67,6 +85,46 @@ def extract_ine_data_with_vision(tool_context: ToolContext, extracted_data: dict
         }
 
 
+def _collapse_whitespace(value):
+    """Remove extra spaces while keeping the text's word order."""
+    return " ".join(value.split())
+
+
+def _clean_curp(value):
+    """Ensure CURP is alphanumeric; clean CURPs skip the filter entirely."""
+    if value.isalnum():
+        return value
+    return "".join(filter(str.isalnum, value))
+
+
+def _clean_postal_code(value):
+    """Ensure postal code is numeric."""
+    if value.isdigit():
+        return value
+    return "".join(filter(str.isdigit, value))
+
+
+def _clean_birth_date(value):
+    """Blank out birth dates that look like YYYY-MM-DD but do not parse."""
+    value = value.lower()
+    if len(value) == 10 and value.count('-') == 2:
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            return ""
+    return value
+
+
+# Per-field cleaning applied to stripped, uppercased values
+_FIELD_CLEANERS = {
+    "full_name": _collapse_whitespace,
+    "curp": _clean_curp,
+    "address": _collapse_whitespace,
+    "postal_code": _clean_postal_code,
+    "birth_date": _clean_birth_date
+}
+
+
 def _clean_extracted_data(raw_data: dict):
     """
     Clean and normalize extracted data from Gemini response.
@@ -77,42 +135,11 @@ def _clean_extracted_data(raw_data: dict):
     Returns:
         Cleaned and normalized data
     """
-    cleaned = {
-        "full_name": "",
-        "curp": "",
-        "address": "",
-        "postal_code": "",
-        "birth_date": ""
-    }
+    cleaned = dict.fromkeys(_FIELD_CLEANERS, "")
     
-    for key in cleaned.keys():
-        if key in raw_data and raw_data[key]:
-            value = str(raw_data[key]).strip().upper()
-            
-            # Special cleaning for each field
-            if key == "full_name":
-                # Remove extra spaces and ensure proper format
-                value = " ".join(value.split())
-            elif key == "curp":
-                # Ensure CURP is uppercase and alphanumeric
-                value = "".join(c for c in value if c.isalnum()).upper()
-            elif key == "address":
-                # Keep address formatting but clean extra spaces
-                value = " ".join(value.split())
-            elif key == "postal_code":
-                # Ensure postal code is numeric
-                value = "".join(c for c in value if c.isdigit())
-            elif key == "birth_date":
-                # Validate date format
-                value = value.lower()
-                if len(value) == 10 and value.count('-') == 2:
-                    try:
-                        # Validate date can be parsed
-                        datetime.strptime(value, "%Y-%m-%d")
-                    except:
-                        value = ""
-            
-            cleaned[key] = value
+    for key, clean in _FIELD_CLEANERS.items():
+        if raw_data.get(key):
+            cleaned[key] = clean(str(raw_data[key]).strip().upper())
     
     return cleaned
 
@@ -139,8 +166,7 @@ def _extract_ine_fields(text):
     text = text.upper().replace('\n', ' ').replace('\r', ' ')
     
     # Extract CURP (18 character alphanumeric code)
-    curp_pattern = r'\b[A-Z]{4}\d{6}[HM][A-Z]{5}[A-Z0-9]{2}\b'
-    curp_match = re.search(curp_pattern, text)
+    curp_match = _CURP_SEARCH_RE.search(text)
     if curp_match:
         extracted["curp"] = curp_match.group()
     
@@ -161,8 +187,7 @@ def _extract_ine_fields(text):
         extracted["birth_date"] = f"{year}-{month_str}-{day_str}"
     
     # Extract postal code (5 digits)
-    postal_pattern = r'\b\d{5}\b'
-    postal_matches = re.findall(postal_pattern, text)
+    postal_matches = _POSTAL_CODE_SEARCH_RE.findall(text)
     if postal_matches:
         # Take the first 5-digit number that's not part of CURP
         for postal in postal_matches:
@@ -171,14 +196,9 @@ def _extract_ine_fields(text):
                 break
     
     # Extract name (appears after "NOMBRE" or similar keywords)
-    name_patterns = [
-        r'NOMBRE[:\s]+([A-Z\s]+?)(?:DOMICILIO|DIRECCION|CURP|$)',
-        r'APELLIDOS[:\s]+([A-Z\s]+?)(?:NOMBRE|DOMICILIO|$)',
-    ]
-    
     name_parts = []
-    for pattern in name_patterns:
-        match = re.search(pattern, text)
+    for pattern in _NAME_PATTERNS:
+        match = pattern.search(text)
         if match:
             name_part = match.group(1).strip()
             if name_part and len(name_part) > 2:
@@ -188,13 +208,8 @@ def _extract_ine_fields(text):
         extracted["full_name"] = " ".join(name_parts[:2])  # First two parts
     
     # Extract address (appears after "DOMICILIO" or "DIRECCION")
-    address_patterns = [
-        r'DOMICILIO[:\s]+([A-Z0-9\s,\.]+?)(?:EDAD|CLAVE|CURP|ESTADO|$)',
-        r'DIRECCION[:\s]+([A-Z0-9\s,\.]+?)(?:EDAD|CLAVE|CURP|ESTADO|$)',
-    ]
-    
-    for pattern in address_patterns:
-        match = re.search(pattern, text)
+    for pattern in _ADDRESS_PATTERNS:
+        match = pattern.search(text)
         if match:
             address = match.group(1).strip()
             if address and len(address) > 10:
@@ -228,13 +243,13 @@ def _validate_extracted_data(data: dict):
         curp = data["curp"]
         if len(curp) != 18:
             errors.append("CURP must be 18 characters long")
-        elif not re.match(r'^[A-Z]{4}\d{6}[HM][A-Z]{5}[A-Z0-9]{2}$', curp):
+        elif not _CURP_FORMAT_RE.match(curp):
             errors.append("CURP format is invalid")
     
     # Validate postal code
     if data.get("postal_code"):
         postal = data["postal_code"]
-        if not re.match(r'^\d{5}$', postal):
+        if not _POSTAL_CODE_FORMAT_RE.match(postal):
             errors.append("Postal code must be 5 digits")
     
     # Validate name
@@ -242,7 +257,7 @@ def _validate_extracted_data(data: dict):
         name = data["full_name"]
         if len(name) < 5:
             errors.append("Name seems too short")
-        elif not re.match(r'^[A-Z\s]+$', name):
+        elif not _NAME_FORMAT_RE.match(name):
             errors.append("Name contains invalid characters")
     
     # Calculate confidence score
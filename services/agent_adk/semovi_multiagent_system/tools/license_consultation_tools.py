@@ -6,6 +6,97 @@ from datetime import datetime, date
 from typing import Optional
 
 from google.adk.tools.tool_context import ToolContext
+from .text_normalization import fold_accents
+
+
+# Accepted spellings (Spanish and English) for vehicle types and procedures.
+# Keys are accent-free; inputs are folded with fold_accents before lookup.
+VEHICLE_TYPE_ALIASES = {
+    "auto": "auto", "automovil": "auto", "automobile": "auto", "car": "auto",
+    "motorcycle": "motorcycle", "motocicleta": "motorcycle", "moto": "motorcycle"
+}
+
+PROCEDURE_ALIASES = {
+    "expedition": "expedition", "expedicion": "expedition", "primera": "expedition", "first": "expedition",
+    "renewal": "renewal", "renovacion": "renewal", "renovar": "renewal", "renew": "renewal",
+    "replacement": "replacement", "reposicion": "replacement", "reponer": "replacement", "replace": "replacement"
+}
+
+
+# Description returned for each license type
+LICENSE_TYPE_DESCRIPTIONS = {
+    "LIC_A": "License for private automobiles and motorcycles up to 400cc",
+    "LIC_A1": "License for motorcycles from 125cc up to 400cc",
+    "LIC_A2": "License for motorcycles greater than 400cc"
+}
+
+# Motorcycles up to this displacement (cc) take LIC_A1; larger ones need LIC_A2
+MOTORCYCLE_A1_MAX_CC = 400
+
+# Base costs for each license type (MXN)
+LICENSE_BASE_COSTS = {
+    "LIC_A": 866.00,
+    "LIC_A1": 651.00,
+    "LIC_A2": 1055.00
+}
+
+# Additional costs for procedures (MXN)
+PROCEDURE_ADDITIONAL_COSTS = {
+    "expedition": 0.00,  # No additional cost for first time
+    "renewal": 0.00,     # No additional cost for renewal
+    "replacement": 158.00  # Additional cost for replacement
+}
+
+# Base requirements for all licenses
+BASE_REQUIREMENTS = (
+    "Official identification (INE/Passport)",
+    "CURP (Population Registry Code)",
+    "Proof of address (not older than 3 months)",
+    "Birth certificate (certified copy)",
+    "Valid medical examination"
+)
+
+# Specific requirements by license type
+LICENSE_SPECIFIC_REQUIREMENTS = {
+    "LIC_A": (
+        "Driving course certificate (for expedition)",
+        "RFC (Tax ID) if applicable"
+    ),
+    "LIC_A1": (
+        "Motorcycle driving course certificate",
+        "RFC (Tax ID) if applicable"
+    ),
+    "LIC_A2": (
+        "Advanced motorcycle course certificate",
+        "Valid LIC_A1 (for upgrade)",
+        "Advanced medical examination",
+        "RFC (Tax ID) if applicable"
+    )
+}
+
+# Procedure-specific requirements
+PROCEDURE_SPECIFIC_REQUIREMENTS = {
+    "expedition": (
+        "Driving course completion certificate",
+        "Medical examination (specific for license type)"
+    ),
+    "renewal": (
+        "Previous license (original)",
+        "Updated medical examination"
+    ),
+    "replacement": (
+        "Police report (in case of theft)",
+        "Sworn statement of truth",
+        "Additional identification document"
+    )
+}
+
+# Minimum age per license type
+LICENSE_MINIMUM_AGES = {
+    "LIC_A": 18,   # 18+ for auto and basic motorcycle
+    "LIC_A1": 18,  # 18+ for intermediate motorcycle
+    "LIC_A2": 21   # 21+ for high-power motorcycle
+}
 
 
 def determine_license_requirements(
@@ -26,29 +117,17 @@ def determine_license_requirements(
         Dict with license type, costs, and requirements
     """
     try:
-        # Normalize and validate inputs
-        vehicle_type_mapping = {
-            "auto": "auto", "automovil": "auto", "automobile": "auto", "car": "auto",
-            "motorcycle": "motorcycle", "motocicleta": "motorcycle", "moto": "motorcycle"
-        }
-        
-        procedure_mapping = {
-            "expedition": "expedition", "expedicion": "expedition", "primera": "expedition", "first": "expedition",
-            "renewal": "renewal", "renovacion": "renewal", "renovar": "renewal", "renew": "renewal",
-            "replacement": "replacement", "reposicion": "replacement", "reponer": "replacement", "replace": "replacement"
-        }
-        
         # Normalize inputs
-        vehicle_type_normalized = vehicle_type_mapping.get(vehicle_type.lower(), vehicle_type)
-        procedure_normalized = procedure_mapping.get(procedure.lower(), procedure)
+        vehicle_type_normalized = VEHICLE_TYPE_ALIASES.get(fold_accents(vehicle_type.strip()), vehicle_type)
+        procedure_normalized = PROCEDURE_ALIASES.get(fold_accents(procedure.strip()), procedure)
         
-        if vehicle_type_normalized not in ["auto", "motorcycle"]:
+        if vehicle_type_normalized not in ("auto", "motorcycle"):
             return {
                 "status": "error",
                 "message": f"Vehicle type '{vehicle_type}' not recognized. Must be 'auto' or 'motorcycle'"
             }
         
-        if procedure_normalized not in ["expedition", "renewal", "replacement"]:
+        if procedure_normalized not in ("expedition", "renewal", "replacement"):
             return {
                 "status": "error", 
                 "message": f"Procedure '{procedure}' not recognized. Must be 'expedition', 'renewal', or 'replacement'"
@@ -129,11 +208,7 @@ def _determine_license_type(vehicle_type, cylinder_capacity):
     """Determine the specific license type based on vehicle characteristics."""
     
     if vehicle_type == "auto":
-        return {
-            "status": "success",
-            "license_type": "LIC_A",
-            "description": "License for private automobiles and motorcycles up to 400cc"
-        }
+        license_type = "LIC_A"
     
     elif vehicle_type == "motorcycle":
         if cylinder_capacity is None:
@@ -142,50 +217,26 @@ def _determine_license_type(vehicle_type, cylinder_capacity):
                 "message": "Cylinder capacity is required for motorcycles"
             }
         
-        if cylinder_capacity <= 125:
-            return {
-                "status": "success", 
-                "license_type": "LIC_A1",
-                "description": "License for motorcycles from 125cc up to 400cc"
-            }
-        elif cylinder_capacity <= 400:
-            return {
-                "status": "success",
-                "license_type": "LIC_A1", 
-                "description": "License for motorcycles from 125cc up to 400cc"
-            }
-        else:  # > 400cc
-            return {
-                "status": "success",
-                "license_type": "LIC_A2",
-                "description": "License for motorcycles greater than 400cc"
-            }
+        license_type = "LIC_A1" if cylinder_capacity <= MOTORCYCLE_A1_MAX_CC else "LIC_A2"
+    
+    else:
+        return {
+            "status": "error",
+            "message": f"Unknown vehicle type: {vehicle_type}"
+        }
     
     return {
-        "status": "error",
-        "message": f"Unknown vehicle type: {vehicle_type}"
+        "status": "success",
+        "license_type": license_type,
+        "description": LICENSE_TYPE_DESCRIPTIONS[license_type]
     }
 
 
 def _get_cost_information(license_type, procedure):
     """Get detailed cost information for license and procedure."""
     
-    # Base costs for each license type
-    base_costs = {
-        "LIC_A": 866.00,
-        "LIC_A1": 651.00, 
-        "LIC_A2": 1055.00
-    }
-    
-    # Additional costs for procedures
-    procedure_costs = {
-        "expedition": 0.00,  # No additional cost for first time
-        "renewal": 0.00,     # No additional cost for renewal
-        "replacement": 158.00  # Additional cost for replacement
-    }
-    
-    base_cost = base_costs.get(license_type, 0.00)
-    additional_cost = procedure_costs.get(procedure.lower(), 0.00)
+    base_cost = LICENSE_BASE_COSTS.get(license_type, 0.00)
+    additional_cost = PROCEDURE_ADDITIONAL_COSTS.get(procedure.lower(), 0.00)
     total_cost = base_cost + additional_cost
     
     return {
@@ -203,54 +254,10 @@ def _get_cost_information(license_type, procedure):
 def _get_requirements_information(license_type, procedure):
     """Get specific requirements for license type and procedure."""
     
-    # Base requirements for all licenses
-    base_requirements = [
-        "Official identification (INE/Passport)",
-        "CURP (Population Registry Code)",
-        "Proof of address (not older than 3 months)",
-        "Birth certificate (certified copy)",
-        "Valid medical examination"
-    ]
-    
-    # Specific requirements by license type
-    license_specific = {
-        "LIC_A": [
-            "Driving course certificate (for expedition)",
-            "RFC (Tax ID) if applicable"
-        ],
-        "LIC_A1": [
-            "Motorcycle driving course certificate",
-            "RFC (Tax ID) if applicable"
-        ],
-        "LIC_A2": [
-            "Advanced motorcycle course certificate", 
-            "Valid LIC_A1 (for upgrade)",
-            "Advanced medical examination",
-            "RFC (Tax ID) if applicable"
-        ]
-    }
-    
-    # Procedure-specific requirements
-    procedure_specific = {
-        "expedition": [
-            "Driving course completion certificate",
-            "Medical examination (specific for license type)"
-        ],
-        "renewal": [
-            "Previous license (original)",
-            "Updated medical examination"
-        ],
-        "replacement": [
-            "Police report (in case of theft)",
-            "Sworn statement of truth",
-            "Additional identification document"
-        ]
-    }
-    
     # Compile all requirements
-    all_requirements = base_requirements.copy()
-    all_requirements.extend(license_specific.get(license_type, []))
-    all_requirements.extend(procedure_specific.get(procedure.lower(), []))
+    all_requirements = list(BASE_REQUIREMENTS)
+    all_requirements.extend(LICENSE_SPECIFIC_REQUIREMENTS.get(license_type, ()))
+    all_requirements.extend(PROCEDURE_SPECIFIC_REQUIREMENTS.get(procedure.lower(), ()))
     
     # Remove duplicates while preserving order
     unique_requirements = []
@@ -263,26 +270,20 @@ def _get_requirements_information(license_type, procedure):
     return {
         "total_requirements": len(unique_requirements),
         "required_documents": unique_requirements,
-        "base_requirements": base_requirements,
-        "license_specific": license_specific.get(license_type, []),
-        "procedure_specific": procedure_specific.get(procedure.lower(), [])
+        "base_requirements": list(BASE_REQUIREMENTS),
+        "license_specific": list(LICENSE_SPECIFIC_REQUIREMENTS.get(license_type, ())),
+        "procedure_specific": list(PROCEDURE_SPECIFIC_REQUIREMENTS.get(procedure.lower(), ()))
     }
 
 
 def _validate_age_requirements(license_type, birth_date):
     """Validate age requirements for specific license type."""
     
-    age_requirements = {
-        "LIC_A": 18,   # 18+ for auto and basic motorcycle
-        "LIC_A1": 18,  # 18+ for intermediate motorcycle
-        "LIC_A2": 21   # 21+ for high-power motorcycle
-    }
-    
     if not birth_date:
         return {
             "status": "pending",
             "message": "Birth date required for age validation",
-            "required_age": age_requirements.get(license_type, 18)
+            "required_age": LICENSE_MINIMUM_AGES.get(license_type, 18)
         }
     
     try:
@@ -296,7 +297,7 @@ def _validate_age_requirements(license_type, birth_date):
            (today.month == birth_date_obj.month and today.day < birth_date_obj.day):
             age -= 1
         
-        required_age = age_requirements.get(license_type, 18)
+        required_age = LICENSE_MINIMUM_AGES.get(license_type, 18)
         is_eligible = age >= required_age
         
         return {
@@ -313,7 +314,7 @@ def _validate_age_requirements(license_type, birth_date):
         return {
             "status": "error",
             "message": "Invalid birth date format. Please use YYYY-MM-DD format.",
-            "required_age": age_requirements.get(license_type, 18)
+            "required_age": LICENSE_MINIMUM_AGES.get(license_type, 18)
         }
 
 
@@ -4,11 +4,27 @@
 
 import math
 from datetime import datetime
+from functools import lru_cache
 
 from google.adk.tools.tool_context import ToolContext
 from .supabase_connection import execute_supabase_query
 
 
+def find_office_in_search_results(tool_context: ToolContext, office_id: int):
+    """
+    Look up an office from the last find_nearby_offices search by its ID.
+    
+    Args:
+        tool_context: Context for accessing session state
+        office_id: ID of the office to look up
+        
+    Returns:
+        The office dict, or None if it is not among the search results
+    """
+    found_offices = tool_context.state.get("office_search", {}).get("found_offices", [])
+    return next((office for office in found_offices if office.get("id") == office_id), None)
+
+
 def find_nearby_offices(postal_code: str, tool_context: ToolContext):
     """
     Find SEMOVI offices near the given postal code using Supabase.
@@ -180,6 +196,12 @@ def _format_operating_hours(hours):
     return ", ".join(formatted_days) if formatted_days else "Hours not available"
 
 
+@lru_cache(maxsize=64)
+def _parse_office_hour(value):
+    """Parse an HH:MM office hour; offices share a handful of distinct values."""
+    return datetime.strptime(value, "%H:%M").time()
+
+
 def _is_office_currently_open(hours):
     """Check if office is currently open based on operating hours."""
     if not hours:
@@ -201,8 +223,8 @@ def _is_office_currently_open(hours):
         return False
     
     try:
-        start_time = datetime.strptime(start_time_str, "%H:%M").time()
-        end_time = datetime.strptime(end_time_str, "%H:%M").time()
+        start_time = _parse_office_hour(start_time_str)
+        end_time = _parse_office_hour(end_time_str)
         
         return start_time <= current_time <= end_time
     except:
@@ -273,11 +295,7 @@ def verify_office_services(
         found_offices = office_search.get("found_offices", [])
         
         # Find the specific office
-        target_office = None
-        for office in found_offices:
-            if office["id"] == office_id:
-                target_office = office
-                break
+        target_office = find_office_in_search_results(tool_context, office_id)
         
         if not target_office:
             return {
@@ -343,15 +361,8 @@ def get_office_details(office_id: int, tool_context: ToolContext):
         Dict with detailed office information
     """
     try:
-        office_search = tool_context.state.get("office_search", {})
-        found_offices = office_search.get("found_offices", [])
-        
         # Find the specific office
-        target_office = None
-        for office in found_offices:
-            if office["id"] == office_id:
-                target_office = office
-                break
+        target_office = find_office_in_search_results(tool_context, office_id)
         
         if not target_office:
             return {
@@ -5,10 +5,14 @@
 import logging
 import os
 import re
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, Any, Optional
 
 from google.adk.tools.tool_context import ToolContext
+from .text_normalization import fold_accents
 from vertexai import rag
 from dotenv import load_dotenv
 
@@ -21,9 +25,71 @@ LOCATION = os.environ.get("GOOGLE_CLOUD_LOCATION")
 DEFAULT_TOP_K = 5
 DEFAULT_DISTANCE_THRESHOLD = 0.5
 DEFAULT_CORPUS_NAME = "semovi"
+# Keep only the most recent queries in session state so it stays bounded
+MAX_QUERY_HISTORY = 50
+# Retrieval results are cached per normalized query. The corpus is shared
+# documentation, so entries are reusable across sessions and simply expire
+# to pick up corpus updates.
+RAG_CACHE_MAX_ENTRIES = 128
+RAG_CACHE_TTL_SECONDS = 3600
 
 logger = logging.getLogger(__name__)
 
+# Corpus name patterns, compiled once at import time
+_CORPUS_RESOURCE_NAME_RE = re.compile(r"^projects/[^/]+/locations/[^/]+/ragCorpora/[^/]+$")
+_CORPUS_ID_UNSAFE_CHARS_RE = re.compile(r"[^a-zA-Z0-9_-]")
+
+# Keyword sets for validate_information_query, each matched in a single pass.
+# Keywords are accent-free and matched against accent-folded queries.
+VALID_QUERY_TOPICS = (
+    "licencia", "requisitos", "documentos", "examen", "curso",
+    "costo", "precio", "oficina", "horario", "tramite", 
+    "procedimiento", "reposicion", "renovacion", "expedicion",
+    "semovi", "manejo", "conducir", "vehiculo", "motocicleta"
+)
+INAPPROPRIATE_QUERY_KEYWORDS = ("hack", "sql", "injection", "admin", "password")
+_VALID_TOPIC_RE = re.compile("|".join(map(re.escape, VALID_QUERY_TOPICS)))
+_INAPPROPRIATE_KEYWORD_RE = re.compile("|".join(map(re.escape, INAPPROPRIATE_QUERY_KEYWORDS)))
+
+# (corpus_name, normalized query) -> (stored_at, results), in LRU order.
+# Guarded by a lock because tool calls from concurrent sessions share it.
+_rag_results_cache = OrderedDict()
+_rag_results_cache_lock = threading.Lock()
+
+# Clock for cache expiry; tests patch this instead of the global time module
+_now = time.monotonic
+
+
+# corpus_name -> (resolved_at, resource name). Shared across sessions so a new
+# session does not list every corpus just to find the SEMOVI one again.
+_corpus_resource_names = {}
+
+
+def _get_cached_results(cache_key):
+    """Return cached retrieval results for a query, or None if missing/expired."""
+    with _rag_results_cache_lock:
+        entry = _rag_results_cache.get(cache_key)
+        if entry is None:
+            return None
+        
+        stored_at, results = entry
+        if _now() - stored_at > RAG_CACHE_TTL_SECONDS:
+            del _rag_results_cache[cache_key]
+            return None
+        
+        _rag_results_cache.move_to_end(cache_key)
+    return list(results)
+
+
+def _store_cached_results(cache_key, results):
+    """Store retrieval results, evicting the least recently used entries."""
+    entry = (_now(), list(results))
+    with _rag_results_cache_lock:
+        _rag_results_cache[cache_key] = entry
+        _rag_results_cache.move_to_end(cache_key)
+        while len(_rag_results_cache) > RAG_CACHE_MAX_ENTRIES:
+            _rag_results_cache.popitem(last=False)
+
 
 def rag_query_semovi(
     query: str,
@@ -54,55 +120,26 @@ def rag_query_semovi(
                 "corpus_name": corpus_name,
             }
 
-        # Check if the corpus exists
-        if not check_corpus_exists(corpus_name, tool_context):
-            return {
-                "status": "error", 
-                "message": "Lo siento, no puedo acceder a la información de trámites en este momento. Por favor intenta más tarde.",
-                "query": query,
-                "corpus_name": corpus_name,
-            }
-
-        # Get the corpus resource name
-        corpus_resource_name = get_corpus_resource_name(corpus_name, tool_context)
-
-        # Configure retrieval parameters
-        rag_retrieval_config = rag.RagRetrievalConfig(
-            top_k=DEFAULT_TOP_K,
-            filter=rag.Filter(vector_distance_threshold=DEFAULT_DISTANCE_THRESHOLD),
-        )
-
-        # Perform the query
-        logger.info(f"Performing RAG query: {query}")
-        response = rag.retrieval_query(
-            rag_resources=[
-                rag.RagResource(
-                    rag_corpus=corpus_resource_name,
-                )
-            ],
-            text=query,
-            rag_retrieval_config=rag_retrieval_config,
-        )
-
-        # Process the response into a more usable format
-        results = []
-        if hasattr(response, "contexts") and response.contexts:
-            for ctx_group in response.contexts.contexts:
-                result = {
-                    "source_uri": (
-                        ctx_group.source_uri if hasattr(ctx_group, "source_uri") else ""
-                    ),
-                    "source_name": (
-                        ctx_group.source_display_name
-                        if hasattr(ctx_group, "source_display_name")
-                        else ""
-                    ),
-                    "content": ctx_group.text if hasattr(ctx_group, "text") else "",
-                    "score": ctx_group.score if hasattr(ctx_group, "score") else 0.0,
-                    "source_section": "Documentación SEMOVI",
-                    "confidence_score": ctx_group.score if hasattr(ctx_group, "score") else 0.0,
+        # Reuse results for a repeated question instead of hitting Vertex AI
+        cache_key = (corpus_name, " ".join(query.lower().split()))
+        results = _get_cached_results(cache_key)
+        
+        if results is None:
+            results = _retrieve_results(query, corpus_name, tool_context)
+            if results is None:
+                return {
+                    "status": "error", 
+                    "message": "Lo siento, no puedo acceder a la información de trámites en este momento. Por favor intenta más tarde.",
+                    "query": query,
+                    "corpus_name": corpus_name,
                 }
-                results.append(result)
+            if results:
+                _store_cached_results(cache_key, results)
+        else:
+            logger.info("Using cached RAG results for query: %s", query)
+        
+        # Best relevance score, shared by the history entry and the response
+        confidence_score = max((r.get("score", 0.0) for r in results), default=0.0)
         
         # Store query in session history
         if "information_queries" not in tool_context.state:
@@ -114,9 +151,12 @@ def rag_query_semovi(
             "filter": filter_by_section,
             "timestamp": datetime.now().isoformat(),
             "results_found": len(results),
-            "confidence_score": max([r.get("score", 0.0) for r in results]) if results else 0.0
+            "confidence_score": confidence_score
         })
         
+        if len(queries_made) > MAX_QUERY_HISTORY:
+            del queries_made[:-MAX_QUERY_HISTORY]
+        
         tool_context.state["information_queries"]["queries_made"] = queries_made
 
         # If we didn't find any results
@@ -137,7 +177,7 @@ def rag_query_semovi(
             "corpus_name": corpus_name,
             "results": results,
             "results_count": len(results),
-            "confidence_score": max([r.get("score", 0.0) for r in results]) if results else 0.0,
+            "confidence_score": confidence_score,
         }
         
     except Exception as e:
@@ -158,6 +198,61 @@ def rag_query_semovi(
         }
 
 
+def _retrieve_results(query, corpus_name, tool_context):
+    """
+    Run a Vertex AI retrieval query against the corpus.
+    
+    Returns:
+        List of result dicts, or None if the corpus is not available
+    """
+    # Check if the corpus exists
+    if not check_corpus_exists(corpus_name, tool_context):
+        return None
+
+    # Get the corpus resource name
+    corpus_resource_name = get_corpus_resource_name(corpus_name, tool_context)
+
+    # Configure retrieval parameters
+    rag_retrieval_config = rag.RagRetrievalConfig(
+        top_k=DEFAULT_TOP_K,
+        filter=rag.Filter(vector_distance_threshold=DEFAULT_DISTANCE_THRESHOLD),
+    )
+
+    # Perform the query
+    logger.info("Performing RAG query: %s", query)
+    response = rag.retrieval_query(
+        rag_resources=[
+            rag.RagResource(
+                rag_corpus=corpus_resource_name,
+            )
+        ],
+        text=query,
+        rag_retrieval_config=rag_retrieval_config,
+    )
+
+    # Process the response into a more usable format
+    results = []
+    if hasattr(response, "contexts") and response.contexts:
+        for ctx_group in response.contexts.contexts:
+            result = {
+                "source_uri": (
+                    ctx_group.source_uri if hasattr(ctx_group, "source_uri") else ""
+                ),
+                "source_name": (
+                    ctx_group.source_display_name
+                    if hasattr(ctx_group, "source_display_name")
+                    else ""
+                ),
+                "content": ctx_group.text if hasattr(ctx_group, "text") else "",
+                "score": ctx_group.score if hasattr(ctx_group, "score") else 0.0,
+                "source_section": "Documentación SEMOVI",
+                "confidence_score": ctx_group.score if hasattr(ctx_group, "score") else 0.0,
+            }
+            results.append(result)
+
+    return results
+
+
 def get_corpus_resource_name(corpus_name: str, tool_context: ToolContext = None) -> str:
     """
     Convert a corpus name to its full resource name if needed.
@@ -170,17 +265,17 @@ def get_corpus_resource_name(corpus_name: str, tool_context: ToolContext = None)
     Returns:
         str: The full resource name of the corpus
     """
-    logger.info(f"Getting resource name for corpus: {corpus_name}")
+    logger.info("Getting resource name for corpus: %s", corpus_name)
 
     # First, check if we have the resource name saved in the tool context
     if tool_context and tool_context.state:
         saved_resource_name = tool_context.state.get(f"corpus_resource_name_{corpus_name}")
         if saved_resource_name:
-            logger.info(f"Found saved resource name: {saved_resource_name}")
+            logger.info("Found saved resource name: %s", saved_resource_name)
             return saved_resource_name
 
     # If it's already a full resource name with the projects/locations/ragCorpora format
-    if re.match(r"^projects/[^/]+/locations/[^/]+/ragCorpora/[^/]+$", corpus_name):
+    if _CORPUS_RESOURCE_NAME_RE.match(corpus_name):
         return corpus_name
 
     # Check if this is a display name of an existing corpus
@@ -194,10 +289,19 @@ def get_corpus_resource_name(corpus_name: str, tool_context: ToolContext = None)
                     tool_context.state[f"corpus_resource_name_{corpus_name}"] = corpus.name
                 return corpus.name
     except Exception as e:
-        logger.warning(f"Error when checking for corpus display name: {str(e)}")
+        logger.warning("Error when checking for corpus display name: %s", e)
         # If we can't check, continue with the default behavior
         pass
 
+    return _build_corpus_resource_name(corpus_name)
+
+
+def _build_corpus_resource_name(corpus_name: str) -> str:
+    """Build the standardized resource name for a corpus without any API calls."""
+    # If it's already a full resource name with the projects/locations/ragCorpora format
+    if _CORPUS_RESOURCE_NAME_RE.match(corpus_name):
+        return corpus_name
+
     # If it contains partial path elements, extract just the corpus ID
     if "/" in corpus_name:
         # Extract the last part of the path as the corpus ID
@@ -206,7 +310,7 @@ def get_corpus_resource_name(corpus_name: str, tool_context: ToolContext = None)
         corpus_id = corpus_name
 
     # Remove any special characters that might cause issues
-    corpus_id = re.sub(r"[^a-zA-Z0-9_-]", "_", corpus_id)
+    corpus_id = _CORPUS_ID_UNSAFE_CHARS_RE.sub("_", corpus_id)
 
     # Construct the standardized resource name
     return f"projects/{PROJECT_ID}/locations/{LOCATION}/ragCorpora/{corpus_id}"
@@ -227,9 +331,19 @@ def check_corpus_exists(corpus_name: str, tool_context: ToolContext) -> bool:
     if tool_context.state.get(f"corpus_exists_{corpus_name}"):
         return True
 
+    # Then corpora already resolved by other sessions in this process
+    resolved = _corpus_resource_names.get(corpus_name)
+    if resolved and _now() - resolved[0] <= RAG_CACHE_TTL_SECONDS:
+        _mark_corpus_found(corpus_name, resolved[1], tool_context)
+        return True
+
     try:
-        # Get full resource name
-        corpus_resource_name = get_corpus_resource_name(corpus_name, tool_context)
+        # Get full resource name; display names are matched in the listing
+        # below, so this avoids a second list_corpora call
+        corpus_resource_name = (
+            tool_context.state.get(f"corpus_resource_name_{corpus_name}")
+            or _build_corpus_resource_name(corpus_name)
+        )
 
         # List all corpora and check if this one exists
         corpora = rag.list_corpora()
@@ -238,22 +352,28 @@ def check_corpus_exists(corpus_name: str, tool_context: ToolContext) -> bool:
                 corpus.name == corpus_resource_name
                 or corpus.display_name == corpus_name
             ):
-                # Update state
-                tool_context.state[f"corpus_exists_{corpus_name}"] = True
-                # Save the actual resource name for future use
-                tool_context.state[f"corpus_resource_name_{corpus_name}"] = corpus.name
-                # Also set this as the current corpus if no current corpus is set
-                if not tool_context.state.get("current_corpus"):
-                    tool_context.state["current_corpus"] = corpus_name
+                _corpus_resource_names[corpus_name] = (_now(), corpus.name)
+                _mark_corpus_found(corpus_name, corpus.name, tool_context)
                 return True
 
         return False
     except Exception as e:
-        logger.error(f"Error checking if corpus exists: {str(e)}")
+        logger.error("Error checking if corpus exists: %s", e)
         # If we can't check, assume it doesn't exist
         return False
 
 
+def _mark_corpus_found(corpus_name: str, resource_name: str, tool_context: ToolContext) -> None:
+    """Record in session state that a corpus exists and where it lives."""
+    # Update state
+    tool_context.state[f"corpus_exists_{corpus_name}"] = True
+    # Save the actual resource name for future use
+    tool_context.state[f"corpus_resource_name_{corpus_name}"] = resource_name
+    # Also set this as the current corpus if no current corpus is set
+    if not tool_context.state.get("current_corpus"):
+        tool_context.state["current_corpus"] = corpus_name
+
+
 def validate_information_query(query: str, tool_context: ToolContext) -> Dict[str, Any]:
     """
     Validate if a query is appropriate for SEMOVI information search.
@@ -266,25 +386,18 @@ def validate_information_query(query: str, tool_context: ToolContext) -> Dict[st
         Dict with validation results
     """
     try:
-        # Define valid query topics
-        valid_topics = [
-            "licencia", "requisitos", "documentos", "examen", "curso",
-            "costo", "precio", "oficina", "horario", "tramite", 
-            "procedimiento", "reposicion", "renovacion", "expedicion",
-            "semovi", "manejo", "conducir", "vehiculo", "motocicleta"
-        ]
-        
-        query_lower = query.lower()
+        # Fold accents so "trámite" or "vehículo" match the keyword sets
+        query_folded = fold_accents(query)
         
         # Check for valid topic keywords
-        has_valid_topic = any(topic in query_lower for topic in valid_topics)
+        has_valid_topic = _VALID_TOPIC_RE.search(query_folded) is not None
         
         # Check query length
-        is_appropriate_length = 3 <= len(query.strip()) <= 200
+        query_length = len(query.strip())
+        is_appropriate_length = 3 <= query_length <= 200
         
         # Check for inappropriate content (basic filter)
-        inappropriate_keywords = ["hack", "sql", "injection", "admin", "password"]
-        has_inappropriate_content = any(keyword in query_lower for keyword in inappropriate_keywords)
+        has_inappropriate_content = _INAPPROPRIATE_KEYWORD_RE.search(query_folded) is not None
         
         is_valid = has_valid_topic and is_appropriate_length and not has_inappropriate_content
         
@@ -293,7 +406,7 @@ def validate_information_query(query: str, tool_context: ToolContext) -> Dict[st
             "has_valid_topic": has_valid_topic,
             "is_appropriate_length": is_appropriate_length,
             "has_inappropriate_content": has_inappropriate_content,
-            "query_length": len(query.strip())
+            "query_length": query_length
         }
         
         if is_valid:
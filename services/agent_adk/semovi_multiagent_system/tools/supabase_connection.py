@@ -6,46 +6,101 @@ import os
 import requests
 import json
 import base64
+import random
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from google.adk.tools.tool_context import ToolContext
 
 
-def get_authenticated_headers(tool_context):
+# Upper bound in seconds for a single retry sleep, including Retry-After waits
+SUPABASE_RETRY_BACKOFF_MAX = 4.0
+
+# (connect, read) timeouts in seconds for Supabase requests; an unreachable
+# host should fail fast instead of holding the tool call for the read timeout
+SUPABASE_REQUEST_TIMEOUT = (5, 30)
+
+
+class _FullJitterRetry(Retry):
+    """Retry policy that sleeps a random time within the exponential backoff window."""
+
+    def get_backoff_time(self):
+        # "Full jitter": spread retries over [0, backoff] so concurrent
+        # sessions do not hit a recovering Supabase in lockstep
+        backoff = min(super().get_backoff_time(), SUPABASE_RETRY_BACKOFF_MAX)
+        return random.random() * backoff
+
+    def get_retry_after(self, response):
+        # Tools run synchronously on the event loop, so never sleep for an
+        # arbitrary server-provided Retry-After
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, SUPABASE_RETRY_BACKOFF_MAX)
+
+
+# Shared HTTP session so Supabase calls reuse pooled keep-alive connections
+# instead of paying a TCP + TLS handshake on every request
+http_session = requests.Session()
+
+# Retry transient Supabase failures (up to 3 retries, i.e. 4 attempts) with
+# jittered exponential backoff, honouring Retry-After on 429/503 up to
+# SUPABASE_RETRY_BACKOFF_MAX. Only idempotent reads are retried so writes such
+# as appointment creation are never replayed. Read timeouts are not retried
+# (read=False): each attempt can already wait the full request timeout, and
+# callers handle Timeout themselves. Connection failures are retried once.
+_SUPABASE_RETRY_POLICY = _FullJitterRetry(
+    total=3,
+    connect=1,
+    read=False,
+    backoff_factor=0.5,
+    status_forcelist=(429, 502, 503, 504),
+    allowed_methods=frozenset({"GET"}),
+    respect_retry_after_header=True,
+    raise_on_status=False
+)
+http_session.mount("https://", HTTPAdapter(max_retries=_SUPABASE_RETRY_POLICY))
+http_session.mount("http://", HTTPAdapter(max_retries=_SUPABASE_RETRY_POLICY))
+
+
+def _get_jwt_token(tool_context):
+    """Return the JWT token from session state or request input, if any."""
+    jwt_token = None
+    if tool_context.state:
+        jwt_token = tool_context.state.get("jwt_token")
+    
+    # Also check if it's directly in the context from input
+    if not jwt_token and hasattr(tool_context, 'request_input'):
+        jwt_token = getattr(tool_context.request_input, 'jwt_token', None)
+    
+    return jwt_token
+
+
+def get_authenticated_headers(tool_context, config=None):
     """
     Get authenticated headers for Supabase requests using JWT token from context.
     
     Args:
         tool_context: Tool context containing JWT token
+        config: Supabase configuration already read by the caller, if any
         
     Returns:
         Dictionary with authentication headers or None if not available
     """
-    try:
-        # Get JWT token from tool context
-        jwt_token = None
-        if tool_context.state:
-            jwt_token = tool_context.state.get("jwt_token")
-        
-        # Also check if it's directly in the context from input
-        if not jwt_token and hasattr(tool_context, 'request_input'):
-            jwt_token = getattr(tool_context.request_input, 'jwt_token', None)
-            
-        if not jwt_token:
-            return None
-        
-        # Get Supabase configuration
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_anon_key = os.getenv("SUPABASE_ANON_KEY")
-        
-        if not supabase_url or not supabase_anon_key:
-            return None
-        
-        return {
-            "Authorization": f"Bearer {jwt_token}",
-            "apikey": supabase_anon_key,
-            "Content-Type": "application/json"
-        }
-    except:
+    jwt_token = _get_jwt_token(tool_context)
+    if not jwt_token:
         return None
+    
+    # Get Supabase configuration
+    if config is None:
+        config = get_supabase_config()
+    if not config:
+        return None
+    
+    return {
+        "Authorization": f"Bearer {jwt_token}",
+        "apikey": config["anon_key"],
+        "Content-Type": "application/json"
+    }
 
 
 def get_user_id_from_jwt(tool_context):
@@ -59,15 +114,7 @@ def get_user_id_from_jwt(tool_context):
         String UUID of the authenticated user, or None if extraction fails
     """
     try:
-        # Get JWT token from tool context
-        jwt_token = None
-        if tool_context.state:
-            jwt_token = tool_context.state.get("jwt_token")
-        
-        # Also check if it's directly in the context from input
-        if not jwt_token and hasattr(tool_context, 'request_input'):
-            jwt_token = getattr(tool_context.request_input, 'jwt_token', None)
-            
+        jwt_token = _get_jwt_token(tool_context)
         if not jwt_token:
             return None
         
@@ -226,7 +273,7 @@ def execute_supabase_query(
                 "message": "Supabase configuration not found in environment variables"
             }
         
-        headers = get_authenticated_headers(tool_context)
+        headers = get_authenticated_headers(tool_context, config)
         if not headers:
             return {
                 "status": "error", 
@@ -237,20 +284,20 @@ def execute_supabase_query(
         url = f"{config['url']}/rest/v1/{endpoint}"
         
         # Add prefer header for POST/PATCH operations
-        if method in ["POST", "PATCH"]:
+        if method in ("POST", "PATCH"):
             headers["Prefer"] = "return=representation"
         
         # Execute request
-        response = requests.request(
+        response = http_session.request(
             method=method,
             url=url,
             headers=headers,
             json=data,
             params=params,
-            timeout=30
+            timeout=SUPABASE_REQUEST_TIMEOUT
         )
         
-        if response.status_code in [200, 201]:
+        if response.status_code in (200, 201):
             return {
                 "status": "success",
                 "data": response.json(),
@@ -0,0 +1,26 @@
+# Copyright 2024 SEMOVI Multiagent System
+
+"""Text normalization helpers shared by SEMOVI tools."""
+
+import unicodedata
+
+
+def fold_accents(text: str) -> str:
+    """
+    Lower-case text and strip diacritics for keyword matching.
+    
+    Lets user input such as "Renovación" or "trámite" match the
+    unaccented keys used in the lookup tables ("renovacion", "tramite").
+    
+    Args:
+        text: Raw text to normalize
+        
+    Returns:
+        Lower-cased text without accents
+    """
+    # Plain ASCII input has nothing to fold
+    if text.isascii():
+        return text.lower()
+    
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
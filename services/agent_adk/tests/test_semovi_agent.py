@@ -315,6 +315,73 @@ class TestSemoviFunctionCalls:
         assert 'procedure' in params
 
 
+class TestSemoviAccentedInput:
+    """Test that accented Spanish input matches the accent-free keyword tables."""
+
+    def setup_method(self):
+        """Setup a bare tool context for each test."""
+        self.tool_context = MagicMock()
+        self.tool_context.state = {}
+
+    def test_accented_license_aliases_are_accepted(self):
+        """Test that "Automóvil" and "Renovación" resolve like their unaccented forms."""
+        from semovi_multiagent_system.tools.license_consultation_tools import determine_license_requirements
+
+        result = determine_license_requirements(self.tool_context, "Automóvil", "Renovación")
+
+        assert result["status"] == "success"
+        assert result["license_type"] == "LIC_A"
+        assert result["procedure_type"] == "RENEWAL"
+
+    def test_accented_motorcycle_expedition_is_accepted(self):
+        """Test that "Expedición" resolves for a motorcycle license."""
+        from semovi_multiagent_system.tools.license_consultation_tools import determine_license_requirements
+
+        result = determine_license_requirements(self.tool_context, "Motocicleta", "Expedición")
+
+        assert result["status"] == "success"
+        assert result["license_type"] == "LIC_A1"
+        assert result["procedure_type"] == "EXPEDITION"
+
+    def test_accented_topic_keywords_are_valid(self):
+        """Test that "trámite" and "vehículo" count as SEMOVI topics."""
+        from semovi_multiagent_system.tools.rag_consultation_tools import validate_information_query
+
+        for query in ("¿Qué trámite necesito?", "requisitos del vehículo"):
+            result = validate_information_query(query, self.tool_context)
+
+            assert result["status"] == "success"
+            assert result["validation"]["has_valid_topic"]
+            assert result["validation"]["is_valid"]
+
+        # Only the accented keyword is present, so the match depends on folding
+        result = validate_information_query("mi vehículo", self.tool_context)
+        assert result["validation"]["has_valid_topic"]
+
+
+class TestSemoviConfirmationPdf:
+    """Test that confirmation PDF filenames are safe to write to disk."""
+
+    def test_path_separators_are_replaced(self):
+        """Test that path traversal in a confirmation code cannot escape the PDF directory."""
+        from semovi_multiagent_system.tools.appointment_booking_tools import _confirmation_pdf_filename
+
+        for confirmation_code in ("../../etc/x", "a/b", "a\\b"):
+            filename = _confirmation_pdf_filename(confirmation_code)
+
+            assert "/" not in filename
+            assert "\\" not in filename
+            assert ".." not in filename
+            assert filename.startswith("SEMOVI_Cita_")
+            assert filename.endswith(".pdf")
+
+    def test_real_confirmation_code_is_unchanged(self):
+        """Test that a generated SEMOVI-YYYYMMDD-XXXX code is kept as is."""
+        from semovi_multiagent_system.tools.appointment_booking_tools import _confirmation_pdf_filename
+
+        assert _confirmation_pdf_filename("SEMOVI-20241210-AB12") == "SEMOVI_Cita_SEMOVI-20241210-AB12.pdf"
+
+
 class TestSemoviSessionState:
     """Test that session state remains consistent throughout interactions."""
     
@@ -424,5 +491,110 @@ class TestSemoviIntegration:
         assert session.state.get("procedure_type") == "EXPEDITION"
 
 
+class TestSemoviRagCache:
+    """Test the process-wide cache in front of Vertex AI RAG retrieval."""
+
+    RESULTS = [{"text": "Requisitos para licencia tipo A", "score": 0.9}]
+
+    def setup_method(self):
+        """Start each test with an empty cache and a bare tool context."""
+        from semovi_multiagent_system.tools import rag_consultation_tools
+
+        self.rag_tools = rag_consultation_tools
+        self.rag_tools._rag_results_cache.clear()
+        self.tool_context = MagicMock()
+        self.tool_context.state = {}
+
+    def teardown_method(self):
+        """Do not leak cached results into other tests."""
+        self.rag_tools._rag_results_cache.clear()
+
+    def test_repeated_query_is_served_from_cache(self):
+        """Test that a query differing only in case and whitespace hits the cache."""
+        with patch.object(self.rag_tools, "_retrieve_results", return_value=list(self.RESULTS)) as mock_retrieve:
+            first = self.rag_tools.rag_query_semovi("Requisitos licencia", self.tool_context)
+            second = self.rag_tools.rag_query_semovi("  requisitos   LICENCIA ", self.tool_context)
+
+        assert mock_retrieve.call_count == 1
+        assert first["status"] == "success"
+        assert second["status"] == "success"
+        assert second["results"] == self.RESULTS
+
+    def test_empty_results_are_not_cached(self):
+        """Test that a query with no results is retried against Vertex AI."""
+        with patch.object(self.rag_tools, "_retrieve_results", return_value=[]) as mock_retrieve:
+            first = self.rag_tools.rag_query_semovi("Requisitos licencia", self.tool_context)
+            second = self.rag_tools.rag_query_semovi("Requisitos licencia", self.tool_context)
+
+        assert mock_retrieve.call_count == 2
+        assert first["status"] == "warning"
+        assert second["status"] == "warning"
+        assert len(self.rag_tools._rag_results_cache) == 0
+
+    def test_entries_expire_after_ttl(self):
+        """Test that a cached entry older than RAG_CACHE_TTL_SECONDS is fetched again."""
+        with patch.object(self.rag_tools, "_retrieve_results", return_value=list(self.RESULTS)) as mock_retrieve, \
+                patch.object(self.rag_tools, "_now", return_value=1000.0) as mock_now:
+            self.rag_tools.rag_query_semovi("Requisitos licencia", self.tool_context)
+
+            mock_now.return_value = 1000.0 + self.rag_tools.RAG_CACHE_TTL_SECONDS
+            self.rag_tools.rag_query_semovi("Requisitos licencia", self.tool_context)
+            assert mock_retrieve.call_count == 1
+
+            mock_now.return_value = 1000.0 + self.rag_tools.RAG_CACHE_TTL_SECONDS + 1
+            self.rag_tools.rag_query_semovi("Requisitos licencia", self.tool_context)
+            assert mock_retrieve.call_count == 2
+
+    def test_cache_is_bounded_and_evicts_oldest(self):
+        """Test that the cache keeps at most RAG_CACHE_MAX_ENTRIES, dropping the oldest first."""
+        max_entries = self.rag_tools.RAG_CACHE_MAX_ENTRIES
+
+        for i in range(max_entries + 1):
+            self.rag_tools._store_cached_results(("semovi", f"consulta {i}"), self.RESULTS)
+
+        assert len(self.rag_tools._rag_results_cache) == max_entries
+        assert ("semovi", "consulta 0") not in self.rag_tools._rag_results_cache
+        assert ("semovi", "consulta 1") in self.rag_tools._rag_results_cache
+        assert ("semovi", f"consulta {max_entries}") in self.rag_tools._rag_results_cache
+
+
+class TestSupabaseRetryPolicy:
+    """Test that Supabase retries cannot stall a tool call for long."""
+
+    def _rate_limited_response(self, retry_after):
+        """Build a 429 response carrying the given Retry-After header."""
+        from urllib3.response import HTTPResponse
+
+        return HTTPResponse(status=429, headers={"Retry-After": retry_after})
+
+    def test_large_retry_after_is_clamped(self):
+        """Test that a long server-provided Retry-After is capped at SUPABASE_RETRY_BACKOFF_MAX."""
+        from semovi_multiagent_system.tools import supabase_connection
+
+        policy = supabase_connection._SUPABASE_RETRY_POLICY
+        response = self._rate_limited_response("60")
+
+        assert policy.get_retry_after(response) == supabase_connection.SUPABASE_RETRY_BACKOFF_MAX
+
+    def test_short_retry_after_is_honoured(self):
+        """Test that a Retry-After below the cap is used as is."""
+        from semovi_multiagent_system.tools import supabase_connection
+
+        policy = supabase_connection._SUPABASE_RETRY_POLICY
+        response = self._rate_limited_response("1")
+
+        assert policy.get_retry_after(response) == 1
+
+    def test_timeouts_are_not_retried_repeatedly(self):
+        """Test that read timeouts are never retried and connection failures only once."""
+        from semovi_multiagent_system.tools import supabase_connection
+
+        policy = supabase_connection._SUPABASE_RETRY_POLICY
+
+        assert policy.read is False
+        assert policy.connect == 1
+        assert supabase_connection.SUPABASE_REQUEST_TIMEOUT[0] < supabase_connection.SUPABASE_REQUEST_TIMEOUT[1]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file